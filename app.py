@@ -4,9 +4,15 @@ This app allows users to upload media files, process them, and view generated do
 """
 import os
 import time
-import base64
+import sqlite3
+import hashlib
 import requests
+from urllib.parse import quote
 import streamlit as st
+import streamlit.components.v1 as components
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional, List
 
 # Set Streamlit port
@@ -15,6 +21,24 @@ os.environ['STREAMLIT_SERVER_PORT'] = '8502'
 # API Configuration
 API_BASE_URL = "http://localhost:7000"
 
+# Seconds a ready document's status is reused before it is re-checked (picks up regenerated versions)
+READY_STATUS_TTL = 300
+
+# Maximum number of file IDs per /status_batch request (matches the API limit)
+STATUS_BATCH_SIZE = 64
+
+# Persistent map of upload content hashes to processed file IDs
+UPLOAD_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "upload_cache.db")
+
+# Show diagnostic output in the UI only when APP_DEBUG=1
+DEBUG = os.environ.get("APP_DEBUG") == "1"
+
+# Component that subscribes to the API's server-sent progress events
+status_events = components.declare_component(
+    "status_events",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "status_events")
+)
+
 # Set page config
 st.set_page_config(
     page_title="CrewAI Project Documentation Generator",
@@ -57,38 +81,63 @@ st.markdown("""
 # Initialize session state
 if "uploaded_files" not in st.session_state:
     st.session_state.uploaded_files = []
+if "digest_to_fileid" not in st.session_state:
+    st.session_state.digest_to_fileid = {}
+if "ready_statuses" not in st.session_state:
+    st.session_state.ready_statuses = {}
+
+@st.cache_resource
+def get_session():
+    """Create a pooled HTTP session shared across reruns and user sessions."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    return session
+
+SESSION = get_session()
 
 # Helper functions
+def _dbg(*args, **kwargs):
+    """Write diagnostic output to the page when debugging is enabled."""
+    if DEBUG:
+        st.write(*args, **kwargs)
+
 def upload_and_process_file(uploaded_file, doc_type="BRD", doc_level="Intermediate"):
     """Upload a file to the API and start processing."""
     try:
-        # Create a files dictionary for the request
-        files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
+        # Send the body through MultipartEncoder so requests does not build the whole
+        # multipart payload (a second copy of the file) up front
+        multipart = MultipartEncoder(fields={
+            "file": (uploaded_file.name, uploaded_file, uploaded_file.type),
+            "doc_type": doc_type,
+            "doc_level": doc_level
+        })
         
         # Log the upload attempt
-        st.write(f"Attempting to upload file: {uploaded_file.name} ({uploaded_file.size} bytes)")
-        st.write(f"Document type: {doc_type}")
-        st.write(f"Documentation level selected: {doc_level}")
+        _dbg(f"Attempting to upload file: {uploaded_file.name} ({uploaded_file.size} bytes)")
+        _dbg(f"Document type: {doc_type}")
+        _dbg(f"Documentation level selected: {doc_level}")
         
         # Make the API request with documentation type and level parameters
-        response = requests.post(
-            f"{API_BASE_URL}/upload", 
-            files=files,
-            data={
-                "doc_type": doc_type,
-                "doc_level": doc_level
-            }
+        response = SESSION.post(
+            f"{API_BASE_URL}/upload",
+            data=multipart,
+            headers={"Content-Type": multipart.content_type}
         )
         
         # Log the response status
-        st.write(f"Upload response status: {response.status_code}")
+        _dbg(f"Upload response status: {response.status_code}")
         
         if response.status_code == 200:
             result = response.json()
-            st.write(f"Response content: {result}")
+            _dbg(f"Response content: {result}")
             
             if result.get("success"):
-                st.write(f"File ID: {result.get('file_id')}")
+                _dbg(f"File ID: {result.get('file_id')}")
                 return result
             else:
                 st.error(f"Upload failed: {result.get('message', 'Unknown error')}")
@@ -96,61 +145,183 @@ def upload_and_process_file(uploaded_file, doc_type="BRD", doc_level="Intermedia
         else:
             st.error(f"Upload failed with status code {response.status_code}")
             try:
-                st.write(f"Error details: {response.json()}")
+                _dbg(f"Error details: {response.json()}")
             except:
-                st.write("Could not parse error response")
+                _dbg("Could not parse error response")
             return None
     except Exception as e:
         st.error(f"Error uploading file: {str(e)}")
         return None
 
+def compute_upload_digest(uploaded_file, doc_type, doc_level):
+    """Hash the uploaded content together with the requested document type and level."""
+    hasher = hashlib.blake2b(digest_size=16)
+    # Hash the underlying buffer directly to avoid copying the file
+    with uploaded_file.getbuffer() as buffer:
+        hasher.update(buffer)
+    hasher.update(f"|{doc_type}|{doc_level}".encode("utf-8"))
+    return hasher.hexdigest()
+
+def _open_upload_cache():
+    """Open the upload cache database, creating its table if needed."""
+    os.makedirs(os.path.dirname(UPLOAD_CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(UPLOAD_CACHE_PATH)
+    conn.execute("CREATE TABLE IF NOT EXISTS upload_cache (digest TEXT PRIMARY KEY, file_id TEXT NOT NULL)")
+    return conn
+
+def get_cached_file_id(digest):
+    """Return the file ID of a previously processed upload with the same digest, if any."""
+    file_id = st.session_state.digest_to_fileid.get(digest)
+    if file_id:
+        return file_id
+    try:
+        conn = _open_upload_cache()
+        try:
+            row = conn.execute("SELECT file_id FROM upload_cache WHERE digest = ?", (digest,)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        _dbg(f"Could not read upload cache: {str(e)}")
+        return None
+    if row:
+        st.session_state.digest_to_fileid[digest] = row[0]
+        return row[0]
+    return None
+
+def cache_file_id(digest, file_id):
+    """Remember the file ID produced for an upload digest."""
+    st.session_state.digest_to_fileid[digest] = file_id
+    try:
+        conn = _open_upload_cache()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO upload_cache (digest, file_id) VALUES (?, ?)",
+                    (digest, file_id)
+                )
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        _dbg(f"Could not write upload cache: {str(e)}")
+
+def forget_file_id(digest):
+    """Drop a cached upload digest, e.g. when its file ID is no longer known to the API."""
+    st.session_state.digest_to_fileid.pop(digest, None)
+    try:
+        conn = _open_upload_cache()
+        try:
+            with conn:
+                conn.execute("DELETE FROM upload_cache WHERE digest = ?", (digest,))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        _dbg(f"Could not update upload cache: {str(e)}")
+
+def is_reusable_file_id(file_id):
+    """
+    Ask the API whether a cached file ID can be reused.
+    
+    Returns True if it exists and has not failed, False if the API reports no
+    status and no documentation (or a failed status), and None if the API
+    could not be reached.
+    """
+    statuses = get_status_batch([file_id])
+    if statuses is None:
+        return None
+    entry = statuses.get(file_id)
+    if not entry:
+        return False
+    if entry.get("documentation_exists"):
+        return True
+    status_data = entry.get("status")
+    return status_data is not None and status_data.get("status") != "failed"
+
 def check_documentation_exists(file_id):
     """Check if documentation exists for the given file ID."""
     try:
-        st.write(f"Checking if documentation exists for file ID: {file_id}")
-        response = requests.get(f"{API_BASE_URL}/documentation/{file_id}")
-        st.write(f"Documentation check status code: {response.status_code}")
+        _dbg(f"Checking if documentation exists for file ID: {file_id}")
+        response = SESSION.head(f"{API_BASE_URL}/documentation/{file_id}", allow_redirects=True)
+        _dbg(f"Documentation check status code: {response.status_code}")
         
         if response.status_code == 200:
-            st.write("Documentation exists!")
+            _dbg("Documentation exists!")
             return True
         else:
-            st.write(f"Documentation not ready yet. Status: {response.status_code}")
+            _dbg(f"Documentation not ready yet. Status: {response.status_code}")
             # Also check processing status
             try:
-                status_response = requests.get(f"{API_BASE_URL}/status/{file_id}")
+                status_response = SESSION.get(f"{API_BASE_URL}/status/{file_id}")
                 if status_response.status_code == 200:
                     status_data = status_response.json()
-                    st.write(f"Processing status: {status_data.get('status')}")
-                    st.write(f"Progress: {status_data.get('progress')}%")
-                    st.write(f"Current stage: {status_data.get('current_stage')}")
+                    _dbg(f"Processing status: {status_data.get('status')}")
+                    _dbg(f"Progress: {status_data.get('progress')}%")
+                    _dbg(f"Current stage: {status_data.get('current_stage')}")
                     if status_data.get('error'):
                         st.error(f"Processing error: {status_data.get('error')}")
             except Exception as status_err:
-                st.write(f"Could not get processing status: {str(status_err)}")
+                _dbg(f"Could not get processing status: {str(status_err)}")
             return False
     except Exception as e:
-        st.write(f"Error checking documentation: {str(e)}")
+        _dbg(f"Error checking documentation: {str(e)}")
         return False
 
-def get_pdf_content(file_id):
-    """Get PDF content for the given file ID."""
-    try:
-        response = requests.get(f"{API_BASE_URL}/download/{file_id}?format=pdf")
-        if response.status_code == 200:
-            return response.content
-        return None
-    except:
-        return None
+def get_status_batch(file_ids):
+    """Get documentation availability and processing status for all file IDs in as few requests as possible."""
+    statuses = {}
+    # The API accepts at most STATUS_BATCH_SIZE IDs per request
+    for start in range(0, len(file_ids), STATUS_BATCH_SIZE):
+        chunk = file_ids[start:start + STATUS_BATCH_SIZE]
+        try:
+            response = SESSION.get(
+                f"{API_BASE_URL}/status_batch",
+                params={"ids": ",".join(chunk)}
+            )
+            if response.status_code != 200:
+                _dbg(f"Batch status check failed. Status: {response.status_code}")
+                return None
+            statuses.update(response.json())
+        except Exception as e:
+            _dbg(f"Error checking batch status: {str(e)}")
+            return None
+    return statuses
+
+def report_documentation_status(file_id, entry):
+    """Report a file's status from a batch entry and return whether documentation exists."""
+    if entry is None:
+        _dbg(f"No status returned for file ID: {file_id}")
+        return False
+    if entry.get("documentation_exists"):
+        _dbg("Documentation exists!")
+        return True
+    status_data = entry.get("status")
+    if status_data:
+        _dbg(f"Processing status: {status_data.get('status')}")
+        _dbg(f"Progress: {status_data.get('progress')}%")
+        _dbg(f"Current stage: {status_data.get('current_stage')}")
+        if status_data.get('error'):
+            st.error(f"Processing error: {status_data.get('error')}")
+    return False
+
+def is_processing_finished(entry):
+    """Return True once a file no longer needs status updates (documentation ready or processing failed)."""
+    if entry is None:
+        return False
+    if entry.get("documentation_exists"):
+        return True
+    return (entry.get("status") or {}).get("status") == "failed"
 
 def get_document_download_url(file_id, format="pdf"):
     """Get download URL for the document."""
     return f"{API_BASE_URL}/download/{file_id}?format={format}"
 
-def display_pdf(pdf_content):
-    """Display PDF content in an iframe."""
-    base64_pdf = base64.b64encode(pdf_content).decode('utf-8')
-    pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" class="pdf-viewer"></iframe>'
+def display_pdf(file_id, doc_version=None):
+    """Display the PDF for the given file ID in an iframe pointing at the download endpoint."""
+    pdf_url = get_document_download_url(file_id, "pdf") + "&inline=true"
+    if doc_version:
+        # Let the browser cache the PDF until the document is regenerated
+        pdf_url += f"&v={quote(str(doc_version))}"
+    # Lazy loading keeps the browser from fetching the PDF while the iframe is hidden
+    pdf_display = f'<iframe src="{pdf_url}#toolbar=1" class="pdf-viewer" loading="lazy"></iframe>'
     st.markdown(pdf_display, unsafe_allow_html=True)
 
 def create_download_button(file_id, format, label):
@@ -214,18 +385,41 @@ if uploaded_file is not None:
 # Process file button
 if uploaded_file is not None:
     if st.sidebar.button("Process File"):
-        with st.spinner("Uploading and processing file..."):
-            result = upload_and_process_file(uploaded_file, doc_type, doc_level)
-            if result:
-                file_id = result.get("file_id")
-                st.session_state.uploaded_files.append({
-                    "file_id": file_id,
-                    "filename": uploaded_file.name,
-                    "doc_type": doc_type,
-                    "doc_level": doc_level,
-                    "upload_time": time.time()
-                })
-                st.success(f"File uploaded successfully! File ID: {file_id}")
+        # Skip re-processing if this exact file was already submitted with the same options
+        digest = compute_upload_digest(uploaded_file, doc_type, doc_level)
+        file_id = get_cached_file_id(digest)
+        reusable = is_reusable_file_id(file_id) if file_id else False
+        if file_id and reusable is False:
+            # The API no longer knows this file (or processing failed), so upload it again
+            forget_file_id(digest)
+            st.session_state.uploaded_files = [
+                f for f in st.session_state.uploaded_files if f["file_id"] != file_id
+            ]
+            st.session_state.ready_statuses.pop(file_id, None)
+            file_id = None
+        
+        if reusable is None:
+            # Keep the cached entry; re-uploading would re-run the whole pipeline
+            st.error("Could not verify the previously processed file with the API. Please try again.")
+            file_id = None
+        elif file_id:
+            st.info(f"This file has already been processed. Reusing File ID: {file_id}")
+        else:
+            with st.spinner("Uploading and processing file..."):
+                result = upload_and_process_file(uploaded_file, doc_type, doc_level)
+                if result:
+                    file_id = result.get("file_id")
+                    cache_file_id(digest, file_id)
+                    st.success(f"File uploaded successfully! File ID: {file_id}")
+        
+        if file_id and not any(f["file_id"] == file_id for f in st.session_state.uploaded_files):
+            st.session_state.uploaded_files.append({
+                "file_id": file_id,
+                "filename": uploaded_file.name,
+                "doc_type": doc_type,
+                "doc_level": doc_level,
+                "upload_time": time.time()
+            })
 
 # Display uploaded files and documentation
 st.header("Generated Documentation")
@@ -233,9 +427,26 @@ st.header("Generated Documentation")
 if not st.session_state.uploaded_files:
     st.info("No files have been uploaded yet. Upload a file to get started.")
 else:
-    # Refresh status button
-    if st.button("Refresh Status"):
-        st.experimental_rerun()
+    # Files with ready documentation reuse their status until it expires; everything
+    # else (including failed files) is re-checked, all in a single round-trip
+    now = time.time()
+    ready_statuses = {
+        file_id: cached
+        for file_id, cached in st.session_state.ready_statuses.items()
+        if now - cached["cached_at"] < READY_STATUS_TTL
+    }
+    st.session_state.ready_statuses = ready_statuses
+    pending_ids = [
+        file_info["file_id"] for file_info in st.session_state.uploaded_files
+        if file_info["file_id"] not in ready_statuses
+    ]
+    fetched_statuses = get_status_batch(pending_ids) if pending_ids else {}
+    batch_failed = fetched_statuses is None
+    statuses = {file_id: cached["entry"] for file_id, cached in ready_statuses.items()}
+    statuses.update(fetched_statuses or {})
+    
+    # Files that are still being processed
+    pending_file_ids = []
     
     # Display each uploaded file and its documentation
     for file_info in st.session_state.uploaded_files:
@@ -245,27 +456,43 @@ else:
         st.subheader(f"File: {filename}")
         st.markdown(f"File ID: `{file_id}`")
         
-        # Check if documentation exists
-        if check_documentation_exists(file_id):
-            # Get PDF content
-            pdf_content = get_pdf_content(file_id)
-            if pdf_content:
-                # Create download buttons
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    create_download_button(file_id, "pdf", "Download PDF")
-                with col2:
-                    create_download_button(file_id, "docx", "Download DOCX")
-                with col3:
-                    create_download_button(file_id, "html", "Download HTML")
-                with col4:
-                    create_download_button(file_id, "json", "Download JSON")
-                
-                # Display PDF
-                st.markdown("### PDF Preview")
-                display_pdf(pdf_content)
-            else:
-                st.warning("PDF content not available. Try refreshing.")
+        # Check if documentation exists, falling back to per-file checks if the batch call failed
+        if file_id in ready_statuses or not batch_failed:
+            documentation_exists = report_documentation_status(file_id, statuses.get(file_id))
+        else:
+            documentation_exists = check_documentation_exists(file_id)
+        
+        if documentation_exists:
+            # Create download buttons
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                create_download_button(file_id, "pdf", "Download PDF")
+            with col2:
+                create_download_button(file_id, "docx", "Download DOCX")
+            with col3:
+                create_download_button(file_id, "html", "Download HTML")
+            with col4:
+                create_download_button(file_id, "json", "Download JSON")
+            
+            # Display PDF only once the user expands the preview
+            with st.expander("PDF Preview", expanded=False):
+                display_pdf(file_id, (statuses.get(file_id) or {}).get("doc_version"))
         else:
             with st.spinner("Documentation is being generated..."):
-                st.info("Documentation is not ready yet. Please wait or refresh.")
+                st.info("Documentation is not ready yet. This page will update as processing progresses.")
+        
+        entry = statuses.get(file_id)
+        if entry and entry.get("documentation_exists"):
+            if file_id not in ready_statuses:
+                ready_statuses[file_id] = {"entry": entry, "cached_at": now}
+        elif not documentation_exists and not is_processing_finished(entry):
+            pending_file_ids.append(file_id)
+    
+    # Rerun when a pushed event reports that a file has finished processing
+    if pending_file_ids:
+        status_events(
+            api_base_url=API_BASE_URL,
+            file_ids=pending_file_ids,
+            key="status_events",
+            default=None
+        )
@@ -3,16 +3,20 @@ FastAPI entry point for the CrewAI Multi-Agent Project Documentation System.
 This module sets up the FastAPI application and defines the API endpoints.
 """
 import os
+import json
+import asyncio
 import logging
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from enum import Enum
 import uuid
+from urllib.parse import parse_qs
 from datetime import datetime
 import uvicorn
 
@@ -28,7 +32,10 @@ from agents.frd_agent import FRDAgent
 from services.local_storage_service import LocalStorageService
 from agents.download_agent import DownloadAgent
 from models.database import (update_processing_status, get_processing_status, 
-                           get_file_metadata, store_file_metadata)
+                           get_file_metadata, store_file_metadata,
+                           subscribe_processing_status, unsubscribe_processing_status,
+                           get_documentation as get_stored_documentation,
+                           get_documentation_many, get_processing_status_many)
 from utils.document_download import get_document_for_download
 
 # Setup logging
@@ -60,6 +67,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Download formats that are already compressed (PDF streams, zipped DOCX)
+PRECOMPRESSED_DOWNLOAD_FORMATS = ("pdf", "docx")
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZip middleware that skips responses gzip cannot help: server-sent event
+    streams (events must be flushed immediately) and PDF/DOCX downloads.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self._should_skip(scope):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+    
+    @staticmethod
+    def _should_skip(scope) -> bool:
+        path = scope["path"]
+        if path.startswith("/events/"):
+            return True
+        if path.startswith("/download/"):
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            # The download route defaults to PDF when no format is given
+            download_format = query.get("format", ["pdf"])[0]
+            return download_format in PRECOMPRESSED_DOWNLOAD_FORMATS
+        return False
+
+# Compress larger responses (documents, downloads) for clients that accept gzip
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
 # Response models
 class ProcessingResponse(BaseModel):
     file_id: str
@@ -403,6 +440,30 @@ async def get_documentation(file_id: str):
         logger.error(f"Error in get_documentation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.head("/documentation/{file_id}")
+async def head_documentation(file_id: str):
+    """
+    Check whether documentation exists for a file without returning its body.
+    
+    Args:
+        file_id: Unique identifier for the file
+        
+    Returns:
+        Response: Empty 200 response if documentation exists
+    """
+    try:
+        documentation = await get_stored_documentation(file_id)
+        
+        if not documentation:
+            raise HTTPException(status_code=404, detail="Documentation not found")
+            
+        return Response(status_code=200)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in head_documentation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 from enum import Enum
 from fastapi import Query
 
@@ -434,6 +495,102 @@ async def get_status(file_id: str):
         logger.error(f"Error in get_status: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+MAX_STATUS_BATCH_SIZE = 64
+
+@app.get("/status_batch")
+async def get_status_batch(
+    ids: str = Query(..., description="Comma-separated list of file IDs"),
+):
+    """
+    Get documentation availability and processing status for several files at once.
+    
+    Args:
+        ids: Comma-separated file IDs (at most MAX_STATUS_BATCH_SIZE)
+        
+    Returns:
+        dict: Entry per file ID with documentation_exists, doc_version and status
+    """
+    file_ids = [file_id.strip() for file_id in ids.split(",") if file_id.strip()]
+    if not file_ids:
+        raise HTTPException(status_code=400, detail="No file IDs provided")
+    if len(file_ids) > MAX_STATUS_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many file IDs: at most {MAX_STATUS_BATCH_SIZE} allowed"
+        )
+    
+    try:
+        # Read each database once and resolve every ID from that snapshot
+        documentation_by_id = await get_documentation_many(file_ids)
+        status_by_id = await get_processing_status_many(file_ids)
+        
+        statuses = {}
+        for file_id in file_ids:
+            documentation = documentation_by_id.get(file_id)
+            statuses[file_id] = {
+                "documentation_exists": bool(documentation),
+                "doc_version": (documentation or {}).get("metadata", {}).get("generated_at"),
+                "status": status_by_id.get(file_id)
+            }
+        return statuses
+    except Exception as e:
+        logger.error(f"Error in get_status_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+EVENT_KEEPALIVE_SECONDS = 15
+
+def format_progress_event(data: Dict[str, Any]) -> str:
+    """Format a status payload as a server-sent progress event."""
+    return f"event: progress\ndata: {json.dumps(data, default=str)}\n\n"
+
+@app.get("/events/{file_id}")
+async def stream_events(file_id: str):
+    """
+    Stream processing progress for a file as server-sent events.
+    
+    Sends the current status first, then one event per status update until the
+    documentation is ready or processing fails. After a "completed" status the
+    documentation is re-checked on every keep-alive, since it may be stored later.
+    
+    Args:
+        file_id: Unique identifier for the file
+        
+    Returns:
+        StreamingResponse: text/event-stream of progress events
+    """
+    async def event_generator():
+        # Subscribe before reading the current state so no update is missed
+        queue = subscribe_processing_status(file_id)
+        try:
+            status = await get_processing_status(file_id)
+            last_status = status
+            while True:
+                if status is not None:
+                    documentation_exists = False
+                    if status.get("status") == "completed":
+                        documentation_exists = bool(await get_stored_documentation(file_id))
+                    yield format_progress_event({**status, "documentation_exists": documentation_exists})
+                    if documentation_exists or status.get("status") == "failed":
+                        return
+                
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                    last_status = status
+                except asyncio.TimeoutError:
+                    status = None
+                    if (last_status or {}).get("status") == "completed" and await get_stored_documentation(file_id):
+                        yield format_progress_event({**last_status, "documentation_exists": True})
+                        return
+                    yield ": keep-alive\n\n"
+        finally:
+            unsubscribe_processing_status(file_id, queue)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @app.get("/download/{file_id}")
 async def download_document(
     file_id: str,
@@ -442,17 +599,22 @@ async def download_document(
         description="Document format to download",
         title="Format",
     ),
+    inline: bool = Query(
+        False,
+        description="Display the document in the browser instead of downloading it",
+    ),
 ):
     """
     Download a document in the selected format.
     Args:
         file_id: Unique identifier for the file
         format: Document format (json, pdf, docx, html)
+        inline: Serve with an inline Content-Disposition (used for previews)
     Returns:
         FileResponse: The document file for download
     """
     try:
-        return await get_document_for_download(file_id, format.value)
+        return await get_document_for_download(file_id, format.value, inline)
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -90,6 +90,20 @@ class JSONDatabase:
             db[key] = value
             await self._write_db(db)
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Optional[Any]]:
+        """
+        Get several values from the database with a single read.
+        
+        Args:
+            keys: Keys to retrieve
+            
+        Returns:
+            Dict mapping each key to its value, or None if not found
+        """
+        async with self.lock:
+            db = await self._read_db()
+            return {key: db.get(key) for key in keys}
+    
     async def delete(self, key: str):
         """
         Delete a key from the database.
@@ -114,6 +128,9 @@ class JSONDatabase:
             db = await self._read_db()
             return list(db.keys())
 
+# Listeners for processing status updates, keyed by file ID
+status_subscribers: Dict[str, List[asyncio.Queue]] = {}
+
 # Database instances
 file_db = JSONDatabase("files")
 transcription_db = JSONDatabase("transcriptions")
@@ -195,6 +212,24 @@ async def get_documentation(file_id: str) -> Optional[Dict[str, Any]]:
         return await documentation_db.get(doc_id)
     return None
 
+async def get_documentation_many(file_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Get documentation for several file IDs with a single database read.
+    
+    Args:
+        file_ids: File IDs
+        
+    Returns:
+        Dict mapping each file ID to its documentation, or None if not found
+    """
+    async with documentation_db.lock:
+        db = await documentation_db._read_db()
+    documentation = {}
+    for file_id in file_ids:
+        doc_id = db.get(f"file_{file_id}")
+        documentation[file_id] = db.get(doc_id) if doc_id else None
+    return documentation
+
 async def get_documentation_by_id(doc_id: str) -> Optional[Dict[str, Any]]:
     """
     Get documentation by documentation ID.
@@ -295,6 +330,38 @@ async def update_processing_status(file_id: str, status: str, progress: int, cur
         
     await status_db.set(file_id, status_data)
     
+    # Notify anyone streaming this file's progress
+    for queue in status_subscribers.get(file_id, []):
+        queue.put_nowait(status_data)
+
+def subscribe_processing_status(file_id: str) -> asyncio.Queue:
+    """
+    Subscribe to processing status updates for a file.
+    
+    Args:
+        file_id: File ID
+        
+    Returns:
+        Queue that receives each status update for the file
+    """
+    queue = asyncio.Queue()
+    status_subscribers.setdefault(file_id, []).append(queue)
+    return queue
+
+def unsubscribe_processing_status(file_id: str, queue: asyncio.Queue):
+    """
+    Stop receiving processing status updates for a file.
+    
+    Args:
+        file_id: File ID
+        queue: Queue returned by subscribe_processing_status
+    """
+    queues = status_subscribers.get(file_id, [])
+    if queue in queues:
+        queues.remove(queue)
+    if not queues:
+        status_subscribers.pop(file_id, None)
+    
 async def get_processing_status(file_id: str) -> Optional[Dict[str, Any]]:
     """
     Get the processing status for a file.
@@ -306,3 +373,15 @@ async def get_processing_status(file_id: str) -> Optional[Dict[str, Any]]:
         Status information if found, None otherwise
     """
     return await status_db.get(file_id)
+
+async def get_processing_status_many(file_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Get the processing status for several files with a single database read.
+    
+    Args:
+        file_ids: File IDs
+        
+    Returns:
+        Dict mapping each file ID to its status information, or None if not found
+    """
+    return await status_db.get_many(file_ids)
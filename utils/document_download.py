@@ -14,17 +14,20 @@ from utils.logger import get_agent_logger
 # Setup logger
 logger = get_agent_logger("document_download")
 
-async def get_document_for_download(file_id: str, format_type: str = "json") -> FileResponse:
+async def get_document_for_download(file_id: str, format_type: str = "json", inline: bool = False) -> FileResponse:
     """
     Get a document for download in the specified format.
     
     Args:
         file_id: Unique identifier for the file
         format_type: Format type for download (json, pdf, docx, html)
+        inline: Serve the document for in-browser display instead of as an attachment
         
     Returns:
         FileResponse: File response for download
     """
+    content_disposition_type = "inline" if inline else "attachment"
+    
     try:
         # Check if format type is supported
         if format_type.lower() not in ["json", "pdf", "docx", "html"]:
@@ -85,7 +88,8 @@ async def get_document_for_download(file_id: str, format_type: str = "json") ->
                     return FileResponse(
                         path=generated_path,
                         media_type=media_type,
-                        filename=filename
+                        filename=filename,
+                        content_disposition_type=content_disposition_type
                     )
             
             raise HTTPException(status_code=404, detail=f"Document not found for file_id: {file_id}")
@@ -95,7 +99,8 @@ async def get_document_for_download(file_id: str, format_type: str = "json") ->
         return FileResponse(
             path=doc_path,
             media_type=media_type,
-            filename=filename
+            filename=filename,
+            content_disposition_type=content_disposition_type
         )
         
     except HTTPException as he: